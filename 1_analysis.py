@@ -5,9 +5,17 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy.sparse import csr_matrix
 from mlxtend.frequent_patterns import apriori, association_rules
-from utils.auth import save_analysis
+from rule_metrics import (RULE_METRICS, EXTRA_METRICS, build_item_index, build_support_lookup,
+                          compute_rule_metrics, filter_rules, sort_rules)
+from parameter_sweep import run_sweep, save_sweep
+from database import SessionLocal
+from analysis_store import build_analysis, save_analyses
+from migrations import run_migrations
+from export import (EXPORT_FORMATS, itemsets_to_arrow, rules_to_arrow, metrics_to_arrow,
+                    write_table, iter_csv_chunks, write_chunks, spool_export)
+import os
+from hierarchy import LEVELS, load_taxonomy, mine_hierarchical
 import numpy as np
-from datetime import datetime
 
 # Authentication check
 if 'authenticated' not in st.session_state or not st.session_state['authenticated']:
@@ -45,11 +53,26 @@ st.sidebar.markdown(f"👤 Welcome, **{username}**!")
 # File Uploader
 uploaded_file = st.sidebar.file_uploader("Choose a file", type=["csv"])
 
+# Optional product -> category -> department mapping for hierarchical mining
+use_hierarchy = st.sidebar.checkbox("Mine across product hierarchy")
+taxonomy_file = None
+if use_hierarchy:
+    st.sidebar.write("Upload a CSV with product, category and department columns, "
+                     "or include category and department columns in the transaction data.")
+    taxonomy_file = st.sidebar.file_uploader("Product taxonomy (optional)", type=["csv"])
+
 # Sidebar parameters for Apriori
 min_support = st.sidebar.slider("Minimum Support", min_value=0.01, max_value=1.0, value=0.05, step=0.01)
 min_confidence = st.sidebar.slider("Minimum Confidence", min_value=0.1, max_value=1.0, value=0.2, step=0.1)
 min_lift = st.sidebar.slider("Minimum Lift", min_value=1.0, max_value=10.0, value=1.5, step=0.1)
 
+# Sidebar parameters for additional rule metrics
+sort_metric = st.sidebar.selectbox("Sort Rules By", RULE_METRICS, index=RULE_METRICS.index('lift'))
+extra_thresholds = {}
+with st.sidebar.expander("Additional Rule Metrics"):
+    for metric in st.multiselect("Filter rules by", EXTRA_METRICS):
+        extra_thresholds[metric] = st.number_input(f"Minimum {metric}", value=0.0, step=0.01)
+
 # Data Preprocessing and EDA Functions
 def clean_column_names(df):
     """
@@ -59,6 +82,12 @@ def clean_column_names(df):
     df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
     return df
 
+def parse_values(text, cast):
+    """
+    Parse a comma-separated list of parameter values for the sweep.
+    """
+    return [cast(value) for value in text.split(',') if value.strip()]
+
 if uploaded_file is not None:
     # Read the data
     df = pd.read_csv(uploaded_file)
@@ -157,18 +186,71 @@ if uploaded_file is not None:
     st.write("Unique Transactions:", df['transactions'].nunique())
     st.write("Unique Items:", df['product'].nunique())
     
-    ###---- Proceed with Market Basket Analysis -----###  
-    # Filter out infrequent products (example: products purchased more than 5 times)
-    product_counts = df['product'].value_counts()
-    min_product_frequency = st.sidebar.slider("Minimum Product Frequency", min_value=1, max_value=100, value=10, step=1)
-    top_products = product_counts[product_counts > min_product_frequency].index
-    df_filtered = df[df['product'].isin(top_products)]
-    
-    if len(df_filtered) == 0:
-        st.error(f"No products meet the minimum frequency threshold of {min_product_frequency}. Please lower the threshold.")
-        st.stop()
+    ###---- Parameter Sweep -----###
+    with st.expander("Parameter Sweep"):
+        if use_hierarchy:
+            # The sweep mines the flat, product-level pipeline only
+            st.info("The parameter sweep covers only the flat, product-level analysis. "
+                    "Turn off 'Mine across product hierarchy' to use it.")
+        else:
+            st.write("Enter comma-separated values for each parameter. The data is mined once per product frequency "
+                     "filter at the lowest support, and every combination is derived from that shared result.")
+            sweep_supports = st.text_input("Minimum Support values", value="0.01, 0.02, 0.05")
+            sweep_confidences = st.text_input("Minimum Confidence values", value="0.2, 0.4")
+            sweep_lifts = st.text_input("Minimum Lift values", value="1.0, 1.5")
+            sweep_frequencies = st.text_input("Minimum Product Frequency values", value="10")
+            save_sweep_results = st.checkbox("Save every grid point to Analysis History")
+        
+            if st.button("Run Sweep"):
+                try:
+                    grid = {
+                        'min_support': parse_values(sweep_supports, float),
+                        'min_confidence': parse_values(sweep_confidences, float),
+                        'min_lift': parse_values(sweep_lifts, float),
+                        'min_product_frequency': parse_values(sweep_frequencies, int),
+                    }
+                    with st.spinner("Running parameter sweep..."):
+                        summary, sweep_results = run_sweep(df, grid)
+                    st.write("### Sweep Summary", summary)
+                
+                    if save_sweep_results:
+                        run_migrations()
+                        db = SessionLocal()
+                        try:
+                            save_sweep(db, username, filename, sweep_results)
+                        finally:
+                            db.close()
+                        st.success(f"Saved {len(sweep_results)} analyses to history.")
+                except Exception as e:
+                    st.error(f"Error during parameter sweep: {str(e)}")
     
-    st.write(f"Filtered data shape: {df_filtered.shape} (after removing infrequent products)")
+    ###---- Proceed with Market Basket Analysis -----###  
+    if use_hierarchy:
+        # Load the product taxonomy from the extra file or the transaction data itself
+        taxonomy_df = clean_column_names(pd.read_csv(taxonomy_file)) if taxonomy_file is not None else df
+        missing_levels = [level for level in LEVELS if level not in taxonomy_df.columns]
+        if missing_levels:
+            st.error(f"Product taxonomy is missing the column(s): {', '.join(missing_levels)}. "
+                     "Please provide product, category and department columns.")
+            st.stop()
+        taxonomy = load_taxonomy(taxonomy_df)
+        st.write(f"Loaded taxonomy for {len(taxonomy)} products")
+        
+        # Long-tail products are kept: they still count towards their category and department
+        min_product_frequency = None
+        df_filtered = df
+    else:
+        # Filter out infrequent products (example: products purchased more than 5 times)
+        product_counts = df['product'].value_counts()
+        min_product_frequency = st.sidebar.slider("Minimum Product Frequency", min_value=1, max_value=100, value=10, step=1)
+        top_products = product_counts[product_counts > min_product_frequency].index
+        df_filtered = df[df['product'].isin(top_products)]
+        
+        if len(df_filtered) == 0:
+            st.error(f"No products meet the minimum frequency threshold of {min_product_frequency}. Please lower the threshold.")
+            st.stop()
+        
+        st.write(f"Filtered data shape: {df_filtered.shape} (after removing infrequent products)")
 
     # Keep 50% of transactions
     df_filtered = df_filtered.sample(frac=0.5, random_state=42)
@@ -176,18 +258,24 @@ if uploaded_file is not None:
 
     # Create a pivot table (binary matrix)
     try:
-        basket = df_filtered.pivot_table(index='transactions', columns='product', aggfunc=lambda x: 1, fill_value=0)
-        # Convert to int8 or bool to reduce memory
-        basket = basket.astype('int8')  # or basket = basket.astype(bool)
-        st.write("### Binary Matrix", basket.head(10))
-        basket.columns = [str(col) for col in basket.columns]
+        if use_hierarchy:
+            # Mine generalized itemsets over products, categories and departments
+            frequent_itemsets, item_labels = mine_hierarchical(df_filtered, taxonomy, min_support)
+            st.write(f"Generalized basket: {len(item_labels)} frequent products, categories and departments")
+        else:
+            basket = df_filtered.pivot_table(index='transactions', columns='product', aggfunc=lambda x: 1, fill_value=0)
+            # Convert to int8 or bool to reduce memory
+            basket = basket.astype('int8')  # or basket = basket.astype(bool)
+            st.write("### Binary Matrix", basket.head(10))
+            basket.columns = [str(col) for col in basket.columns]
+            item_labels = basket.columns
 
-        # Convert to sparse matrix for efficient processing
-        basket_sparse = csr_matrix(basket.values)
-        basket_df = pd.DataFrame.sparse.from_spmatrix(basket_sparse, columns=basket.columns)
-        
-        # Apply Apriori algorithm on the sparse matrix
-        frequent_itemsets = apriori(basket_df, min_support=min_support, use_colnames=True)
+            # Convert to sparse matrix for efficient processing
+            basket_sparse = csr_matrix(basket.values)
+            basket_df = pd.DataFrame.sparse.from_spmatrix(basket_sparse, columns=basket.columns)
+            
+            # Apply Apriori algorithm on the sparse matrix
+            frequent_itemsets = apriori(basket_df, min_support=min_support, use_colnames=True)
         
         if len(frequent_itemsets) == 0:
             st.warning("No frequent itemsets found with the current support threshold. Try lowering the minimum support value.")
@@ -195,7 +283,13 @@ if uploaded_file is not None:
         
         # Generate Association Rules
         rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=min_confidence)
-        rules = rules[rules['lift'] >= min_lift]
+        
+        # Compute all rule metrics in one vectorized pass, then filter and sort
+        item_index = build_item_index(item_labels)
+        support_lookup = build_support_lookup(frequent_itemsets, item_index)
+        rules = compute_rule_metrics(rules, support_lookup, item_index)
+        rules = filter_rules(rules, {'lift': min_lift, **extra_thresholds})
+        rules = sort_rules(rules, sort_metric)
         
         if len(rules) == 0:
             st.warning("No association rules found with the current confidence and lift thresholds. Try lowering the minimum confidence or lift values.")
@@ -224,6 +318,52 @@ if uploaded_file is not None:
         plt.ylabel("Confidence")
         st.pyplot(plt)
         
+        # Export Results
+        st.subheader("Export Results")
+        export_col1, export_col2 = st.columns(2)
+        with export_col1:
+            export_data = st.selectbox("Data to export", ["Rules", "Frequent Itemsets", "Rule Metrics"])
+        with export_col2:
+            export_format = st.selectbox("Export format", list(EXPORT_FORMATS) + ["CSV"])
+        export_name = f"{filename.rsplit('.', 1)[0]}_{export_data.lower().replace(' ', '_')}"
+        # Identifies the analysis and selection a prepared export belongs to
+        taxonomy_key = (taxonomy_file.name, taxonomy_file.size) if taxonomy_file is not None else None
+        export_key = (filename, min_support, min_confidence, min_lift, min_product_frequency, use_hierarchy,
+                      taxonomy_key, sort_metric, tuple(sorted(extra_thresholds.items())), len(rules), export_data, export_format)
+        
+        # Encode only on demand, chunk by chunk into a temporary file kept across reruns
+        if st.button("Prepare Export"):
+            metrics = [metric for metric in RULE_METRICS if metric in rules.columns]
+            if export_format == "CSV":
+                export_frames = {
+                    "Rules": lambda: rules[['antecedents', 'consequents'] + metrics],
+                    "Frequent Itemsets": lambda: frequent_itemsets[['itemsets', 'support']],
+                    "Rule Metrics": lambda: rules[metrics],
+                }
+                extension, mime = "csv", "text/csv"
+                write = lambda sink: write_chunks(iter_csv_chunks(export_frames[export_data]()), sink)
+            else:
+                export_tables = {
+                    "Rules": lambda: rules_to_arrow(rules),
+                    "Frequent Itemsets": lambda: itemsets_to_arrow(frequent_itemsets),
+                    "Rule Metrics": lambda: metrics_to_arrow(rules),
+                }
+                extension, mime = EXPORT_FORMATS[export_format]
+                write = lambda sink: write_table(export_tables[export_data](), sink, export_format)
+            
+            previous_export = st.session_state.pop('analysis_export', None)
+            if previous_export and os.path.exists(previous_export['path']):
+                os.remove(previous_export['path'])
+            st.session_state['analysis_export'] = {
+                'key': export_key, 'path': spool_export(write, f".{extension}"),
+                'file_name': f"{export_name}.{extension}", 'mime': mime
+            }
+        
+        prepared_export = st.session_state.get('analysis_export')
+        if prepared_export and prepared_export['key'] == export_key and os.path.exists(prepared_export['path']):
+            with open(prepared_export['path'], 'rb') as export_file:
+                st.download_button(f"Download {export_format}", data=export_file,
+                                   file_name=prepared_export['file_name'], mime=prepared_export['mime'])
         
         # Save Analysis button
         if st.button("Save Analysis"):
@@ -232,19 +372,22 @@ if uploaded_file is not None:
                 st.stop()
 
             try:
-                # Prepare data for saving
-                analysis_data = {
-                    'username': username,
-                    'timestamp': datetime.now(),
-                    'rules': rules.to_dict(),
-                    'support_threshold': min_support,
-                    'confidence_threshold': min_confidence,
-                    'lift_threshold': min_lift,
-                    'total_rules': len(rules)
-                }
-                
-                # Save analysis
-                save_analysis(analysis_data)
+                # Save the analysis with its itemsets and every rule metric
+                analysis = build_analysis(
+                    username, filename, frequent_itemsets, rules,
+                    transaction_count=df_filtered['transactions'].nunique(),
+                    item_count=df_filtered['product'].nunique(),
+                    min_support=min_support,
+                    min_confidence=min_confidence,
+                    min_lift=min_lift,
+                    min_product_frequency=min_product_frequency,
+                )
+                run_migrations()
+                db = SessionLocal()
+                try:
+                    save_analyses(db, [analysis])
+                finally:
+                    db.close()
                 st.success(f"Analysis saved successfully for user {username}!")
                 
                 # Store username in session state for analysis history
@@ -1,7 +1,12 @@
 import streamlit as st
 import pandas as pd
 import ast
-from utils.auth import get_user_analyses, get_analysis_details
+import os
+from rule_metrics import EXTRA_METRICS
+from database import engine, SessionLocal
+from analysis_store import get_user_analyses, get_analysis_details
+from migrations import run_migrations
+from export import EXPORT_FORMATS, iter_saved_csv_chunks, write_saved, write_chunks, spool_export
 
 # Set page config
 st.set_page_config(
@@ -18,7 +23,16 @@ username = st.text_input("Enter your username to view analyses:", value=default_
 
 if username:
     # Get analyses for the specified username
-    analyses = get_user_analyses(username.strip())
+    try:
+        run_migrations()
+        db = SessionLocal()
+        try:
+            analyses = get_user_analyses(db, username.strip())
+        finally:
+            db.close()
+    except Exception as e:
+        st.error(f"Error loading analyses: {str(e)}")
+        st.stop()
 
     if not analyses:
         st.info(f"No analyses found for username: {username}. Please check your username or go to the Analysis page to create new analyses.")
@@ -30,7 +44,16 @@ if username:
 
     if selected_analysis:
         analysis_id = analysis_options[selected_analysis]
-        analysis, itemsets, rules = get_analysis_details(analysis_id, username.strip())
+        # Itemsets and rules are only read once the analysis is confirmed to be the user's
+        try:
+            db = SessionLocal()
+            try:
+                analysis, itemsets, rules = get_analysis_details(db, analysis_id, username.strip())
+            finally:
+                db.close()
+        except Exception as e:
+            st.error(f"Error loading analysis details: {str(e)}")
+            st.stop()
         
         if analysis:
             # Display basic information
@@ -80,7 +103,9 @@ if username:
             if rules:
                 rule_data = []
                 for rule in rules:
-                    antecedents, consequents, support, confidence, lift = rule
+                    antecedents, consequents, support, confidence, lift = rule[:5]
+                    # Additional metrics are optional columns on older analyses
+                    extra_metrics = {metric: value for metric, value in zip(EXTRA_METRICS, rule[5:]) if value is not None}
                     
                     # Convert string representation of frozenset to actual frozenset
                     try:
@@ -95,7 +120,8 @@ if username:
                             "Consequents": ", ".join(consequents_list),
                             "Support": support,
                             "Confidence": confidence,
-                            "Lift": lift
+                            "Lift": lift,
+                            **extra_metrics
                         })
                     except:
                         rule_data.append({
@@ -103,13 +129,51 @@ if username:
                             "Consequents": consequents,
                             "Support": support,
                             "Confidence": confidence,
-                            "Lift": lift
+                            "Lift": lift,
+                            **extra_metrics
                         })
                 
                 rule_df = pd.DataFrame(rule_data)
                 st.dataframe(rule_df, use_container_width=True)
             else:
                 st.write("No rules found.")
+            
+            # Export the saved analysis straight from the database
+            st.subheader("Export")
+            export_col1, export_col2 = st.columns(2)
+            with export_col1:
+                export_kind = st.selectbox("Data to export", ["rules", "itemsets", "metrics"])
+            with export_col2:
+                export_format = st.selectbox("Export format", list(EXPORT_FORMATS) + ["CSV"])
+            export_key = (analysis_id, export_kind, export_format)
+            
+            # Rows are streamed from the database cursor into a temporary file, whose
+            # path is kept in session state so the download button survives reruns
+            if st.button("Prepare Export"):
+                export_name = f"analysis_{analysis_id}_{export_kind}"
+                try:
+                    if export_format == "CSV":
+                        extension, mime = "csv", "text/csv"
+                        write = lambda sink: write_chunks(iter_saved_csv_chunks(engine, analysis_id, export_kind), sink)
+                    else:
+                        extension, mime = EXPORT_FORMATS[export_format]
+                        write = lambda sink: write_saved(engine, analysis_id, sink, export_kind, export_format)
+                    
+                    previous_export = st.session_state.pop('details_export', None)
+                    if previous_export and os.path.exists(previous_export['path']):
+                        os.remove(previous_export['path'])
+                    st.session_state['details_export'] = {
+                        'key': export_key, 'path': spool_export(write, f".{extension}"),
+                        'file_name': f"{export_name}.{extension}", 'mime': mime
+                    }
+                except Exception as e:
+                    st.error(f"Error exporting analysis: {str(e)}")
+            
+            prepared_export = st.session_state.get('details_export')
+            if prepared_export and prepared_export['key'] == export_key and os.path.exists(prepared_export['path']):
+                with open(prepared_export['path'], 'rb') as export_file:
+                    st.download_button(f"Download {export_format}", data=export_file,
+                                       file_name=prepared_export['file_name'], mime=prepared_export['mime'])
         else:
             st.warning("Analysis not found.")
 else:
@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
-from utils.auth import get_user_analyses
+from database import SessionLocal
+from analysis_store import get_user_analyses
+from migrations import run_migrations
 
 # Set page config
 st.set_page_config(
@@ -17,7 +19,16 @@ username = st.text_input("Enter your username to view analyses:", value=default_
 
 if username:
     # Get analyses for the specified username
-    analyses = get_user_analyses(username.strip())
+    try:
+        run_migrations()
+        db = SessionLocal()
+        try:
+            analyses = get_user_analyses(db, username.strip())
+        finally:
+            db.close()
+    except Exception as e:
+        st.error(f"Error loading analyses: {str(e)}")
+        st.stop()
 
     if analyses:
         # Convert to DataFrame for display
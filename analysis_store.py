@@ -0,0 +1,119 @@
+import math
+
+from sqlalchemy import select
+
+from models import AnalysisHistory, SavedItemset, SavedRule
+from rule_metrics import RULE_METRICS
+
+# Analysis summary columns, in the tuple order the history and details pages display
+ANALYSIS_COLUMNS = [
+    AnalysisHistory.id,
+    AnalysisHistory.filename,
+    AnalysisHistory.timestamp,
+    AnalysisHistory.transaction_count,
+    AnalysisHistory.item_count,
+    AnalysisHistory.min_support,
+    AnalysisHistory.min_confidence,
+    AnalysisHistory.min_lift,
+    AnalysisHistory.frequent_itemset_count,
+    AnalysisHistory.rule_count,
+]
+
+
+def _metric_value(value):
+    """
+    Float for a metric column; NaN is stored as NULL.
+    """
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def build_analysis(username, filename, frequent_itemsets, rules, transaction_count, item_count,
+                   min_support, min_confidence, min_lift, min_product_frequency=None):
+    """
+    Build an AnalysisHistory row with its itemsets and rules, every rule
+    carrying all of its metrics (see rule_metrics.RULE_METRICS).
+    """
+    analysis = AnalysisHistory(
+        username=username,
+        filename=filename,
+        transaction_count=int(transaction_count),
+        item_count=int(item_count),
+        min_support=min_support,
+        min_confidence=min_confidence,
+        min_lift=min_lift,
+        min_product_frequency=min_product_frequency,
+        frequent_itemset_count=len(frequent_itemsets),
+        rule_count=len(rules),
+    )
+    analysis.itemsets = [
+        SavedItemset(itemset=str(itemset), support=float(support))
+        for itemset, support in zip(frequent_itemsets['itemsets'], frequent_itemsets['support'])
+    ]
+    if len(rules):
+        metrics = [metric for metric in RULE_METRICS if metric in rules.columns]
+        analysis.rules = [
+            SavedRule(
+                antecedents=str(antecedents),
+                consequents=str(consequents),
+                **{metric: _metric_value(value) for metric, value in zip(metrics, values)}
+            )
+            for antecedents, consequents, *values in zip(
+                rules['antecedents'], rules['consequents'], *(rules[metric] for metric in metrics)
+            )
+        ]
+    return analysis
+
+
+def save_analyses(db, analyses):
+    """
+    Save AnalysisHistory rows (with their itemsets and rules) in a single
+    transaction. Returns the new analysis IDs.
+    """
+    try:
+        db.add_all(analyses)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return [analysis.id for analysis in analyses]
+
+
+def get_user_analyses(db, username):
+    """
+    Summary tuples of every analysis saved by `username`, newest first,
+    in ANALYSIS_COLUMNS order.
+    """
+    query = (select(*ANALYSIS_COLUMNS)
+             .where(AnalysisHistory.username == username)
+             .order_by(AnalysisHistory.timestamp.desc()))
+    return [tuple(row) for row in db.execute(query)]
+
+
+def get_analysis_details(db, analysis_id, username):
+    """
+    (analysis, itemsets, rules) of an analysis owned by `username`:
+    the summary tuple, (itemset, support) tuples and get_saved_rules
+    tuples. Returns (None, [], []) when the analysis is not theirs.
+    """
+    query = select(*ANALYSIS_COLUMNS).where(AnalysisHistory.id == analysis_id,
+                                            AnalysisHistory.username == username)
+    analysis = db.execute(query).first()
+    if analysis is None:
+        return None, [], []
+
+    itemsets_query = (select(SavedItemset.itemset, SavedItemset.support)
+                      .where(SavedItemset.analysis_id == analysis_id)
+                      .order_by(SavedItemset.id))
+    itemsets = [tuple(row) for row in db.execute(itemsets_query)]
+    return tuple(analysis), itemsets, get_saved_rules(db, analysis_id)
+
+
+def get_saved_rules(db, analysis_id):
+    """
+    Rules of a saved analysis as tuples: antecedents, consequents, then
+    every metric in RULE_METRICS order (NULL for older analyses).
+    """
+    columns = [SavedRule.antecedents, SavedRule.consequents] + [getattr(SavedRule, m) for m in RULE_METRICS]
+    query = select(*columns).where(SavedRule.analysis_id == analysis_id).order_by(SavedRule.id)
+    return [tuple(row) for row in db.execute(query)]
@@ -0,0 +1,251 @@
+import ast
+import json
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select
+
+from models import SavedItemset, SavedRule
+from rule_metrics import RULE_METRICS
+
+CSV_CHUNK_SIZE = 50_000
+
+# Binary export formats: label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'Arrow IPC': ('arrow', 'application/vnd.apache.arrow.file'),
+}
+
+# Model and stored columns of a saved analysis, per export kind
+SAVED_MODELS = {
+    'itemsets': SavedItemset,
+    'rules': SavedRule,
+    'metrics': SavedRule,
+}
+SAVED_COLUMNS = {
+    'itemsets': ['itemset', 'support'],
+    'rules': ['antecedents', 'consequents'] + RULE_METRICS,
+    'metrics': RULE_METRICS,
+}
+
+# Stored itemset columns and their names in the live export
+SAVED_ITEMSET_COLUMNS = {
+    'itemset': 'itemsets',
+    'antecedents': 'antecedents',
+    'consequents': 'consequents',
+}
+
+
+def _itemset_array(itemsets):
+    """
+    Arrow list<string> array from a column of frozensets of product names.
+    """
+    return pa.array([sorted(str(item) for item in itemset) for itemset in itemsets], type=pa.list_(pa.string()))
+
+
+def _format_itemset(itemset):
+    """
+    CSV text of an itemset: a JSON list of its sorted product names, so
+    names containing commas or quotes read back unchanged.
+    """
+    return json.dumps(sorted(str(item) for item in itemset))
+
+
+def _metric_array(values):
+    """
+    Arrow float64 array wrapping a metric column's NumPy buffer without
+    copying the values; NaN becomes null, as in saved analyses where NaN is
+    stored as NULL.
+    """
+    return pa.array(np.ascontiguousarray(values.to_numpy(dtype=np.float64)), from_pandas=True)
+
+
+def itemsets_to_arrow(frequent_itemsets):
+    """
+    Convert a frequent itemsets DataFrame to an Arrow table.
+    """
+    return pa.table({
+        'itemsets': _itemset_array(frequent_itemsets['itemsets']),
+        'support': _metric_array(frequent_itemsets['support']),
+    })
+
+
+def rules_to_arrow(rules):
+    """
+    Convert a rules DataFrame to an Arrow table.
+
+    Metric columns are handed to Arrow as contiguous float64 NumPy arrays,
+    which Arrow wraps without copying (see _metric_array).
+    """
+    columns = {
+        'antecedents': _itemset_array(rules['antecedents']),
+        'consequents': _itemset_array(rules['consequents']),
+    }
+    for metric in RULE_METRICS:
+        if metric in rules.columns:
+            columns[metric] = _metric_array(rules[metric])
+    return pa.table(columns)
+
+
+def metrics_to_arrow(rules):
+    """
+    Arrow table holding only the metric columns of a rules DataFrame.
+    """
+    return rules_to_arrow(rules).drop(['antecedents', 'consequents'])
+
+
+def write_table(table, sink, export_format):
+    """
+    Write an Arrow table in one of EXPORT_FORMATS.
+    `sink` is a file path or a writable file-like object.
+    """
+    if export_format == 'Parquet':
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _format_csv(df, header):
+    """
+    CSV text of a DataFrame chunk via pandas' C writer; missing values and
+    NaN are written as empty fields.
+    """
+    return df.to_csv(index=False, header=header)
+
+
+def iter_csv_chunks(df, chunk_size=CSV_CHUNK_SIZE):
+    """
+    Yield a DataFrame of itemsets or rules as CSV text, chunk_size rows at a
+    time, so large results can be written out without building one CSV
+    string. Itemset columns are written as JSON lists of product names.
+    """
+    itemset_columns = [col for col in ('itemsets', 'antecedents', 'consequents') if col in df.columns]
+    yield _format_csv(df.iloc[:0], header=True)
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size].copy()
+        for col in itemset_columns:
+            chunk[col] = chunk[col].map(_format_itemset)
+        yield _format_csv(chunk, header=False)
+
+
+def write_chunks(chunks, sink):
+    """
+    Write CSV text chunks to a binary file-like object as UTF-8.
+    """
+    for chunk in chunks:
+        sink.write(chunk.encode('utf-8'))
+
+
+def spool_export(write, suffix):
+    """
+    Run `write(sink)` against a temporary file on disk and return its path,
+    so a large export is encoded chunk by chunk instead of in memory.
+    The caller removes the file once it is no longer offered for download.
+    """
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as sink:
+        write(sink)
+    return sink.name
+
+
+def parse_itemset(text):
+    """
+    Sorted product names of an itemset stored as its frozenset repr,
+    e.g. "frozenset({'bread', 'milk'})".
+    """
+    if text is None:
+        return None
+    inner = text[len('frozenset('):-1] if text.startswith('frozenset(') and text.endswith(')') else text
+    try:
+        return sorted(str(item) for item in ast.literal_eval(inner))
+    except (ValueError, SyntaxError):
+        return [text]
+
+
+def saved_schema(kind):
+    """
+    Arrow schema of a saved analysis export, identical to the live export:
+    itemset columns as list<string>, metrics as float64.
+    """
+    return pa.schema([
+        (SAVED_ITEMSET_COLUMNS[name], pa.list_(pa.string())) if name in SAVED_ITEMSET_COLUMNS else (name, pa.float64())
+        for name in SAVED_COLUMNS[kind]
+    ])
+
+
+def iter_saved_rows(engine, analysis_id, kind='rules', chunk_size=CSV_CHUNK_SIZE):
+    """
+    Stream the rows of a saved analysis ('rules', 'itemsets' or 'metrics')
+    straight from the database with a server-side cursor, chunk_size rows
+    at a time, without materializing ORM objects.
+    """
+    model = SAVED_MODELS[kind]
+    columns = [getattr(model, name) for name in SAVED_COLUMNS[kind]]
+    query = select(*columns).where(model.analysis_id == analysis_id).order_by(model.id)
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+        for partition in result.partitions(chunk_size):
+            yield partition
+
+
+def iter_saved_batches(engine, analysis_id, kind='rules', chunk_size=CSV_CHUNK_SIZE):
+    """
+    Yield a saved analysis as Arrow record batches in saved_schema(kind),
+    one batch per streamed chunk.
+    """
+    schema = saved_schema(kind)
+    for rows in iter_saved_rows(engine, analysis_id, kind, chunk_size):
+        arrays = [
+            pa.array([parse_itemset(value) for value in values] if name in SAVED_ITEMSET_COLUMNS else values,
+                     type=field.type)
+            for name, values, field in zip(SAVED_COLUMNS[kind], zip(*rows), schema)
+        ]
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def iter_saved_csv_chunks(engine, analysis_id, kind='rules', chunk_size=CSV_CHUNK_SIZE):
+    """
+    Yield a saved analysis as CSV text, streamed from the database, with
+    the same columns and itemset formatting as iter_csv_chunks.
+    """
+    names = saved_schema(kind).names
+    yield _format_csv(pd.DataFrame(columns=names), header=True)
+    for rows in iter_saved_rows(engine, analysis_id, kind, chunk_size):
+        chunk = pd.DataFrame.from_records(rows, columns=names)
+        for stored, name in zip(SAVED_COLUMNS[kind], names):
+            if stored in SAVED_ITEMSET_COLUMNS:
+                chunk[name] = chunk[name].map(lambda text: _format_itemset(parse_itemset(text) or []))
+        yield _format_csv(chunk, header=False)
+
+
+def write_saved_parquet(engine, analysis_id, sink, kind='rules', chunk_size=CSV_CHUNK_SIZE):
+    """
+    Write a saved analysis to Parquet, one row group per streamed chunk.
+    `sink` is a file path or a writable file-like object.
+    """
+    with pq.ParquetWriter(sink, saved_schema(kind)) as writer:
+        for batch in iter_saved_batches(engine, analysis_id, kind, chunk_size):
+            writer.write_batch(batch)
+
+
+def write_saved_ipc(engine, analysis_id, sink, kind='rules', chunk_size=CSV_CHUNK_SIZE):
+    """
+    Write a saved analysis to the Arrow IPC file format, one record batch
+    per streamed chunk. `sink` is a file path or a writable file-like object.
+    """
+    with pa.ipc.new_file(sink, saved_schema(kind)) as writer:
+        for batch in iter_saved_batches(engine, analysis_id, kind, chunk_size):
+            writer.write_batch(batch)
+
+
+def write_saved(engine, analysis_id, sink, kind='rules', export_format='Parquet', chunk_size=CSV_CHUNK_SIZE):
+    """
+    Write a saved analysis in one of EXPORT_FORMATS.
+    """
+    if export_format == 'Parquet':
+        write_saved_parquet(engine, analysis_id, sink, kind, chunk_size)
+    else:
+        write_saved_ipc(engine, analysis_id, sink, kind, chunk_size)
@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+from scipy.sparse import csc_matrix, csr_matrix, hstack
+
+# Taxonomy levels, finest first
+LEVELS = ['product', 'category', 'department']
+
+# Separator between ancestor names in a node label
+PATH_SEPARATOR = ' > '
+
+
+def load_taxonomy(taxonomy_df, levels=LEVELS):
+    """
+    Clean a product -> category -> department mapping: one row per product,
+    every known level as a string. Missing parents stay missing.
+    """
+    taxonomy = taxonomy_df[levels].dropna(subset=[levels[0]]).copy()
+    for level in levels:
+        known = taxonomy[level].notna()
+        taxonomy[level] = taxonomy[level].astype(object)
+        taxonomy.loc[known, level] = taxonomy.loc[known, level].astype(str)
+    return taxonomy.drop_duplicates(subset=levels[0]).reset_index(drop=True)
+
+
+def node_label(level, path, levels=LEVELS):
+    """
+    Item name of a taxonomy node. Products keep their plain name so rules
+    read as before; coarser nodes are labelled with their level and full
+    ancestor path, coarsest first (e.g. 'category=Electronics > Accessories').
+    """
+    if level == levels[0]:
+        return str(path)
+    return f"{level}=" + PATH_SEPARATOR.join(name for name in path if name)
+
+
+def transaction_matrix(df):
+    """
+    Sparse binary transactions x products matrix from the standardized
+    'transactions' and 'product' columns.
+    """
+    transaction_codes, transactions = pd.factorize(df['transactions'])
+    product_codes, products = pd.factorize(df['product'].astype(str))
+    matrix = csr_matrix(
+        (np.ones(len(df), dtype=np.int32), (transaction_codes, product_codes)),
+        shape=(len(transactions), len(products))
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix, products
+
+
+def _level_baskets(basket, products, taxonomy, min_support, levels):
+    """
+    Frequent taxonomy nodes, coarsest level first.
+
+    Each level's basket is the product basket times a sparse product -> group
+    membership matrix. Coarse nodes are keyed by their full ancestor path, so
+    equally named categories in different departments stay separate, and
+    products with an unknown parent at a level get no node there. Only
+    products whose parent is frequent are expanded, since a child can never
+    be more frequent than its parent.
+    Returns the node columns, their labels and, per product, the node index
+    of each of its frequent ancestors (-1 when not frequent or unknown).
+    """
+    n_transactions, n_products = basket.shape
+    paths = taxonomy.set_index(levels[0]).reindex(products)[levels[1:]]
+
+    columns, labels, product_nodes = [], [], []
+    expand = np.ones(n_products, dtype=bool)
+    n_nodes = 0
+    for depth in reversed(range(len(levels))):
+        level = levels[depth]
+        if depth == 0:
+            group_codes, groups = np.arange(n_products), products
+        else:
+            ancestry = paths[levels[:depth:-1] + [level]].fillna('')
+            group_codes, groups = pd.factorize(pd.Series(list(ancestry.itertuples(index=False, name=None))))
+            group_codes = np.where(paths[level].notna().to_numpy(), group_codes, -1)
+
+        rows = np.flatnonzero(expand & (group_codes >= 0))
+        membership = csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, group_codes[rows])),
+                                shape=(n_products, len(groups)))
+        level_basket = (basket @ membership).tocsc()
+        level_basket.data[:] = 1
+        support = np.asarray(level_basket.sum(axis=0)).ravel() / n_transactions
+
+        frequent = np.flatnonzero(support >= min_support)
+        node_index = np.full(len(groups), -1)
+        node_index[frequent] = n_nodes + np.arange(len(frequent))
+        n_nodes += len(frequent)
+
+        columns.append(level_basket[:, frequent])
+        labels.extend(node_label(level, groups[g], levels) for g in frequent)
+        nodes = np.where(group_codes >= 0, node_index[group_codes], -1)
+        product_nodes.append(nodes)
+        # Products with an unknown parent here are only bounded by coarser ancestors
+        expand &= (nodes >= 0) | (group_codes < 0)
+
+    return hstack(columns, format='csc'), labels, np.column_stack(product_nodes)
+
+
+def _related_matrix(product_nodes, n_nodes):
+    """
+    Sparse node x node matrix marking every node paired with one of its
+    ancestors or descendants. Such itemsets are redundant and never mined.
+    """
+    rows, cols = [], []
+    n_levels = product_nodes.shape[1]
+    for i in range(n_levels):
+        for j in range(n_levels):
+            if i == j:
+                continue
+            pairs = product_nodes[:, [i, j]]
+            pairs = pairs[(pairs >= 0).all(axis=1)]
+            rows.append(pairs[:, 0])
+            cols.append(pairs[:, 1])
+    if not rows:
+        # A single level has no ancestors to exclude
+        return csr_matrix((n_nodes, n_nodes), dtype=np.int32)
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    related = csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(n_nodes, n_nodes))
+    related.data[:] = 1
+    return related
+
+
+def mine_hierarchical(df, taxonomy, min_support, levels=LEVELS, max_len=None):
+    """
+    Mine generalized frequent itemsets over a product taxonomy.
+
+    Items are the frequent nodes of every level (products, categories,
+    departments); itemsets never contain a node together with one of its
+    ancestors. Support counts are computed level-wise with sparse matrix
+    products: all one-item extensions of the frequent k-itemsets are
+    counted at once as P.T @ X, where P holds the k-itemset indicator
+    columns and X the node basket.
+
+    Returns (frequent_itemsets, labels): a DataFrame in the same
+    'support'/'itemsets' layout as mlxtend's apriori, and the node labels
+    (the generalized basket columns).
+    """
+    basket, products = transaction_matrix(df)
+    n_transactions = basket.shape[0]
+    if n_transactions == 0:
+        return pd.DataFrame(columns=['support', 'itemsets']), []
+
+    nodes, labels, product_nodes = _level_baskets(basket, products, taxonomy, min_support, levels)
+    n_nodes = nodes.shape[1]
+    related = _related_matrix(product_nodes, n_nodes)
+
+    support = np.asarray(nodes.sum(axis=0)).ravel() / n_transactions
+    itemsets = [(node,) for node in range(n_nodes)]
+    all_itemsets, all_supports = list(itemsets), list(support)
+
+    indicator = nodes
+    k = 1
+    while itemsets and (max_len is None or k < max_len):
+        itemset_matrix = csr_matrix(
+            (np.ones(len(itemsets) * k, dtype=np.int32),
+             (np.repeat(np.arange(len(itemsets)), k), np.array(itemsets).ravel())),
+            shape=(len(itemsets), n_nodes)
+        )
+        counts = (indicator.T @ nodes).tocsr()
+        # Drop extensions by an ancestor or descendant of an item already in the set
+        counts = counts - counts.multiply((itemset_matrix @ related).astype(bool))
+        counts.eliminate_zeros()
+        counts = counts.tocoo()
+
+        last_item = np.array([itemset[-1] for itemset in itemsets])
+        keep = (counts.col > last_item[counts.row]) & (counts.data / n_transactions >= min_support)
+        rows, cols = counts.row[keep], counts.col[keep]
+
+        itemsets = [itemsets[r] + (c,) for r, c in zip(rows, cols)]
+        all_itemsets.extend(itemsets)
+        all_supports.extend(counts.data[keep] / n_transactions)
+        indicator = csc_matrix(indicator[:, rows].multiply(nodes[:, cols]))
+        k += 1
+
+    frequent_itemsets = pd.DataFrame({
+        'support': all_supports,
+        'itemsets': [frozenset(labels[node] for node in itemset) for itemset in all_itemsets],
+    })
+    return frequent_itemsets, labels
@@ -0,0 +1,41 @@
+from functools import lru_cache
+
+from sqlalchemy import inspect, text
+
+from rule_metrics import EXTRA_METRICS
+
+# Columns added to existing tables after they were first created: table -> [(column, SQL type)]
+ADDED_COLUMNS = {
+    'analysis_history': [('username', 'TEXT'), ('min_product_frequency', 'INTEGER')],
+    'saved_rules': [(metric, 'DOUBLE PRECISION') for metric in EXTRA_METRICS],
+}
+
+
+def add_missing_columns(bind):
+    """
+    Idempotently add every column in ADDED_COLUMNS that an existing table
+    is missing, as a nullable column. Tables that do not exist are skipped.
+    """
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table, columns in ADDED_COLUMNS.items():
+            if not inspector.has_table(table):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table)}
+            for name, sql_type in columns:
+                if name not in existing:
+                    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {sql_type} NULL"))
+
+
+@lru_cache(maxsize=None)
+def run_migrations():
+    """
+    Bring the application database up to date, once per process.
+    """
+    from database import engine
+    add_missing_columns(engine)
+
+
+if __name__ == '__main__':
+    run_migrations()
+    print("Database schema is up to date.")
@@ -8,6 +8,7 @@ class AnalysisHistory(Base):
     __tablename__ = 'analysis_history'
     
     id = Column(Integer, primary_key=True, index=True)
+    username = Column(Text, index=True)
     timestamp = Column(DateTime, default=datetime.now)
     filename = Column(Text)
     transaction_count = Column(Integer)
@@ -15,6 +16,7 @@ class AnalysisHistory(Base):
     min_support = Column(Float)
     min_confidence = Column(Float)
     min_lift = Column(Float)
+    min_product_frequency = Column(Integer, nullable=True)
     frequent_itemset_count = Column(Integer)
     rule_count = Column(Integer)
     
@@ -32,6 +34,12 @@ class SavedRule(Base):
     support = Column(Float)
     confidence = Column(Float)
     lift = Column(Float)
+    # Optional interestingness measures (see rule_metrics.EXTRA_METRICS)
+    leverage = Column(Float, nullable=True)
+    conviction = Column(Float, nullable=True)
+    zhangs_metric = Column(Float, nullable=True)
+    jaccard = Column(Float, nullable=True)
+    all_confidence = Column(Float, nullable=True)
     
     analysis = relationship("AnalysisHistory", back_populates="rules")
 
@@ -0,0 +1,136 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from mlxtend.frequent_patterns import apriori, association_rules
+
+from analysis_store import build_analysis, save_analyses
+from rule_metrics import build_item_index, build_support_lookup, compute_rule_metrics, filter_rules
+
+SWEEP_PARAMETERS = ['min_support', 'min_confidence', 'min_lift', 'min_product_frequency']
+
+
+def build_basket(df, min_product_frequency, sample_frac=0.5, random_state=42):
+    """
+    Filter out infrequent products, sample transactions and build the
+    boolean basket matrix, the same way the analysis page does.
+    Expects the standardized 'transactions' and 'product' columns.
+    """
+    product_counts = df['product'].value_counts()
+    top_products = product_counts[product_counts > min_product_frequency].index
+    df_filtered = df[df['product'].isin(top_products)]
+    if sample_frac < 1.0:
+        df_filtered = df_filtered.sample(frac=sample_frac, random_state=random_state)
+
+    basket = pd.crosstab(df_filtered['transactions'], df_filtered['product']).astype(bool)
+    basket.columns = [str(col) for col in basket.columns]
+    return basket
+
+
+def _mine_shared(df, min_product_frequency, min_support, min_confidence):
+    """
+    Mine once at the lowest support/confidence of a sweep group.
+    Runs in a worker process, so it must stay a module-level function.
+    """
+    basket = build_basket(df, min_product_frequency)
+    if basket.empty:
+        return basket.shape, pd.DataFrame(columns=['support', 'itemsets']), pd.DataFrame()
+
+    frequent_itemsets = apriori(basket, min_support=min_support, use_colnames=True)
+    if len(frequent_itemsets) == 0:
+        return basket.shape, frequent_itemsets, pd.DataFrame()
+
+    rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=min_confidence)
+    item_index = build_item_index(basket.columns)
+    support_lookup = build_support_lookup(frequent_itemsets, item_index)
+    rules = compute_rule_metrics(rules, support_lookup, item_index)
+    return basket.shape, frequent_itemsets, rules
+
+
+def expand_grid(grid):
+    """
+    Expand a parameter grid (parameter -> list of values) into a list of
+    grid point dicts covering every combination.
+    """
+    values = [list(grid[param]) for param in SWEEP_PARAMETERS]
+    return [dict(zip(SWEEP_PARAMETERS, combo)) for combo in itertools.product(*values)]
+
+
+def run_sweep(df, grid, max_workers=None):
+    """
+    Run the analysis for every point of a parameter grid.
+
+    Points sharing a product-frequency filter share one basket matrix and are
+    mined once at their lowest support and confidence; each point's itemsets
+    and rules are then derived by filtering that shared result. Only distinct
+    product-frequency filters are mined in parallel across processes.
+
+    Returns (summary, results): a DataFrame with itemset and rule counts per
+    grid point, and a list of per-point dicts holding the parameters,
+    counts, itemsets and rules.
+    """
+    points = expand_grid(grid)
+    groups = {}
+    for point in points:
+        groups.setdefault(point['min_product_frequency'], []).append(point)
+
+    jobs = {
+        frequency: (df, frequency,
+                    min(p['min_support'] for p in group_points),
+                    min(p['min_confidence'] for p in group_points))
+        for frequency, group_points in groups.items()
+    }
+
+    if len(jobs) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {frequency: executor.submit(_mine_shared, *args) for frequency, args in jobs.items()}
+            mined = {frequency: future.result() for frequency, future in futures.items()}
+    else:
+        mined = {frequency: _mine_shared(*args) for frequency, args in jobs.items()}
+
+    results = []
+    for point in points:
+        (transaction_count, item_count), frequent_itemsets, rules = mined[point['min_product_frequency']]
+        itemsets = frequent_itemsets[frequent_itemsets['support'] >= point['min_support']]
+        if len(rules):
+            rules = filter_rules(rules, {
+                'support': point['min_support'],
+                'confidence': point['min_confidence'],
+                'lift': point['min_lift'],
+            })
+        results.append({
+            **point,
+            'transaction_count': transaction_count,
+            'item_count': item_count,
+            'frequent_itemset_count': len(itemsets),
+            'rule_count': len(rules),
+            'itemsets': itemsets,
+            'rules': rules,
+        })
+
+    summary = pd.DataFrame([
+        {key: value for key, value in result.items() if key not in ('itemsets', 'rules')}
+        for result in results
+    ])
+    return summary, results
+
+
+def save_sweep(db, username, filename, results):
+    """
+    Save every grid point of a sweep for `username`, with its itemsets and
+    rules, in a single transaction. Each point keeps its product-frequency
+    filter, so points differing only in that filter stay distinguishable.
+    """
+    analyses = [
+        build_analysis(
+            username, filename, result['itemsets'], result['rules'],
+            transaction_count=result['transaction_count'],
+            item_count=result['item_count'],
+            min_support=result['min_support'],
+            min_confidence=result['min_confidence'],
+            min_lift=result['min_lift'],
+            min_product_frequency=result['min_product_frequency'],
+        )
+        for result in results
+    ]
+    return save_analyses(db, analyses)
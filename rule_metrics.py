@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+# Metrics that have always been stored with a saved rule
+BASE_METRICS = ['support', 'confidence', 'lift']
+
+# Additional interestingness measures, persisted as optional columns
+EXTRA_METRICS = ['leverage', 'conviction', 'zhangs_metric', 'jaccard', 'all_confidence']
+
+RULE_METRICS = BASE_METRICS + EXTRA_METRICS
+
+
+def build_item_index(columns):
+    """
+    Map every product name (basket matrix column) to an integer item ID.
+    """
+    return {str(item): i for i, item in enumerate(columns)}
+
+
+def itemset_key(itemset, item_index):
+    """
+    Hashable key for an itemset: the sorted tuple of its item IDs.
+    """
+    return tuple(sorted(item_index[str(item)] for item in itemset))
+
+
+def build_support_lookup(frequent_itemsets, item_index):
+    """
+    Build the itemset support lookup (sorted item-ID tuple -> support)
+    from an Apriori frequent itemsets DataFrame.
+    """
+    return {
+        itemset_key(itemset, item_index): support
+        for itemset, support in zip(frequent_itemsets['itemsets'], frequent_itemsets['support'])
+    }
+
+
+def _item_supports(support_lookup, n_items):
+    """
+    Dense array of single-item supports indexed by item ID.
+    """
+    item_support = np.full(n_items, np.nan)
+    for key, support in support_lookup.items():
+        if len(key) == 1:
+            item_support[key[0]] = support
+    return item_support
+
+
+def _item_hashes(n_items):
+    """
+    Fixed random 64-bit hash per item ID. An itemset hashes to the XOR of
+    its items, so the hash of a rule's union is the XOR of its antecedent
+    and consequent hashes (they are disjoint).
+    """
+    return np.random.default_rng(0).integers(0, 2 ** 63, size=n_items, dtype=np.uint64)
+
+
+def _reduce_keys(keys, values, ufunc):
+    """
+    Reduce `values` (indexed by item ID) over the items of every key.
+    """
+    lengths = np.fromiter((len(k) for k in keys), dtype=np.int64, count=len(keys))
+    flat_items = np.fromiter((i for k in keys for i in k), dtype=np.int64, count=int(lengths.sum()))
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    return ufunc.reduceat(values[flat_items], offsets)
+
+
+def _unique_itemsets(itemsets, item_index, item_hash, item_support):
+    """
+    Factorize a column of itemsets. Returns the code of every row and, per
+    distinct itemset, its hash and largest single-item support.
+    """
+    codes, uniques = pd.factorize(itemsets)
+    keys = [itemset_key(itemset, item_index) for itemset in uniques]
+    if not keys:
+        return codes, np.empty(0, dtype=np.uint64), np.empty(0)
+    return codes, _reduce_keys(keys, item_hash, np.bitwise_xor), _reduce_keys(keys, item_support, np.maximum)
+
+
+def compute_rule_metrics(rules, support_lookup, item_index):
+    """
+    Compute support, confidence, lift, leverage, conviction, Zhang's metric,
+    Jaccard and all-confidence for every rule in one vectorized pass.
+
+    Antecedents and consequents are factorized so each distinct itemset is
+    resolved only once; the support lookup is matched by itemset hash and
+    supports are gathered per rule with NumPy indexing. All metrics are then
+    derived with NumPy array arithmetic over the rules.
+    Returns a copy of `rules` with the metric columns (re)written.
+    """
+    rules = rules.copy()
+    item_hash = _item_hashes(len(item_index))
+    item_support = _item_supports(support_lookup, len(item_index))
+
+    # Hash and support of every frequent itemset in the lookup
+    lookup_keys = list(support_lookup)
+    if lookup_keys:
+        lookup_hashes = pd.Index(_reduce_keys(lookup_keys, item_hash, np.bitwise_xor))
+    else:
+        lookup_hashes = pd.Index(np.empty(0, dtype=np.uint64))
+    lookup_supports = np.append(np.fromiter(support_lookup.values(), dtype=float, count=len(lookup_keys)), np.nan)
+
+    def supports(hashes):
+        # get_indexer returns -1 for itemsets missing from the lookup, which picks the trailing NaN
+        return lookup_supports[lookup_hashes.get_indexer(hashes)]
+
+    a_codes, a_hashes, a_max_item = _unique_itemsets(rules['antecedents'], item_index, item_hash, item_support)
+    c_codes, c_hashes, c_max_item = _unique_itemsets(rules['consequents'], item_index, item_hash, item_support)
+
+    s_a = supports(a_hashes)[a_codes]
+    s_c = supports(c_hashes)[c_codes]
+    s_ab = supports(a_hashes[a_codes] ^ c_hashes[c_codes])
+
+    # Largest single-item support inside each rule, for all-confidence
+    max_item_support = np.maximum(a_max_item[a_codes], c_max_item[c_codes])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        confidence = s_ab / s_a
+        lift = confidence / s_c
+        leverage = s_ab - s_a * s_c
+        conviction = np.where(confidence >= 1.0, np.inf, (1.0 - s_c) / (1.0 - confidence))
+        zhang_denominator = np.maximum(s_ab * (1.0 - s_a), s_a * (s_c - s_ab))
+        zhangs_metric = np.where(zhang_denominator == 0, 0.0, leverage / zhang_denominator)
+        jaccard = s_ab / (s_a + s_c - s_ab)
+        all_confidence = s_ab / max_item_support
+
+    rules['antecedent support'] = s_a
+    rules['consequent support'] = s_c
+    rules['support'] = s_ab
+    rules['confidence'] = confidence
+    rules['lift'] = lift
+    rules['leverage'] = leverage
+    rules['conviction'] = conviction
+    rules['zhangs_metric'] = zhangs_metric
+    rules['jaccard'] = jaccard
+    rules['all_confidence'] = all_confidence
+    return rules
+
+
+def filter_rules(rules, thresholds):
+    """
+    Keep rules meeting every minimum in `thresholds` (metric -> min value).
+    Thresholds set to None are ignored.
+    """
+    mask = np.ones(len(rules), dtype=bool)
+    for metric, minimum in thresholds.items():
+        if minimum is None:
+            continue
+        mask &= rules[metric].to_numpy(dtype=float) >= minimum
+    return rules[mask]
+
+
+def sort_rules(rules, metric, ascending=False):
+    """
+    Sort rules by any metric column. NaN values are placed last.
+    """
+    values = rules[metric].to_numpy(dtype=float)
+    order = np.argsort(values if ascending else -values, kind='stable')
+    return rules.iloc[order]
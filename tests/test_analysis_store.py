@@ -0,0 +1,47 @@
+import math
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from analysis_store import build_analysis, get_analysis_details, get_user_analyses, save_analyses
+from models import Base
+from rule_metrics import RULE_METRICS
+
+
+@pytest.fixture
+def db():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def test_saved_analysis_is_read_back_by_its_owner_only(db):
+    frequent_itemsets = pd.DataFrame({
+        'support': [0.6, 0.5, 0.4],
+        'itemsets': [frozenset({'bread'}), frozenset({'milk'}), frozenset({'bread', 'milk'})],
+    })
+    rules = pd.DataFrame({
+        'antecedents': [frozenset({'bread'})],
+        'consequents': [frozenset({'milk'})],
+        **{metric: [0.25] for metric in RULE_METRICS},
+    })
+    rules['conviction'] = math.inf
+    rules['zhangs_metric'] = math.nan
+    analysis_id = save_analyses(db, [build_analysis('alice', 'baskets.csv', frequent_itemsets, rules,
+                                                   10, 2, 0.1, 0.2, 1.0)])[0]
+
+    analyses = get_user_analyses(db, 'alice')
+    assert [(a[0], a[1], a[3], a[4], a[8], a[9]) for a in analyses] == [(analysis_id, 'baskets.csv', 10, 2, 3, 1)]
+    assert get_user_analyses(db, 'bob') == []
+
+    analysis, itemsets, saved_rules = get_analysis_details(db, analysis_id, 'alice')
+    assert analysis[0] == analysis_id
+    assert [support for _, support in itemsets] == [0.6, 0.5, 0.4]
+    metrics = dict(zip(RULE_METRICS, saved_rules[0][2:]))
+    assert metrics['lift'] == 0.25
+    assert metrics['conviction'] == math.inf
+    assert metrics['zhangs_metric'] is None
+
+    assert get_analysis_details(db, analysis_id, 'bob') == (None, [], [])
@@ -0,0 +1,82 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from analysis_store import build_analysis, save_analyses
+from export import (iter_csv_chunks, iter_saved_csv_chunks, itemsets_to_arrow, metrics_to_arrow, parse_itemset,
+                    rules_to_arrow, write_saved)
+from models import Base
+from rule_metrics import RULE_METRICS
+
+
+@pytest.fixture
+def analysis():
+    frequent_itemsets = pd.DataFrame({
+        'support': [0.6, 0.5, 0.4],
+        'itemsets': [frozenset({'bread'}), frozenset({'milk, whole'}), frozenset({'bread', 'milk, whole'})],
+    })
+    rules = pd.DataFrame({
+        'antecedents': [frozenset({'bread'}), frozenset({'milk, whole'})],
+        'consequents': [frozenset({'milk, whole'}), frozenset({'bread'})],
+        **{metric: [0.5, float('inf')] for metric in RULE_METRICS},
+    })
+    rules['zhangs_metric'] = [0.5, float('nan')]
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    analysis_id = save_analyses(db, [build_analysis('alice', 'baskets.csv', frequent_itemsets, rules,
+                                                   10, 2, 0.1, 0.2, 1.0)])[0]
+    return engine, analysis_id, frequent_itemsets, rules
+
+
+def test_parse_itemset():
+    assert parse_itemset("frozenset({'milk', 'bread'})") == ['bread', 'milk']
+    assert parse_itemset("frozenset({'tea (green)'})") == ['tea (green)']
+    assert parse_itemset('not an itemset') == ['not an itemset']
+
+
+@pytest.mark.parametrize('export_format', ['Parquet', 'Arrow IPC'])
+def test_saved_export_matches_live_export(analysis, export_format):
+    engine, analysis_id, frequent_itemsets, rules = analysis
+    live_tables = {
+        'itemsets': itemsets_to_arrow(frequent_itemsets),
+        'rules': rules_to_arrow(rules),
+        'metrics': metrics_to_arrow(rules),
+    }
+
+    for kind, live in live_tables.items():
+        buffer = io.BytesIO()
+        write_saved(engine, analysis_id, buffer, kind, export_format, chunk_size=1)
+        if export_format == 'Parquet':
+            saved = pq.read_table(io.BytesIO(buffer.getvalue()))
+        else:
+            saved = pa.ipc.open_file(pa.BufferReader(buffer.getvalue())).read_all()
+        assert saved.equals(live), kind
+
+
+def test_saved_csv_matches_live_csv(analysis):
+    engine, analysis_id, frequent_itemsets, rules = analysis
+    live_frames = {
+        'itemsets': frequent_itemsets[['itemsets', 'support']],
+        'rules': rules[['antecedents', 'consequents'] + RULE_METRICS],
+        'metrics': rules[RULE_METRICS],
+    }
+
+    for kind, frame in live_frames.items():
+        saved = "".join(iter_saved_csv_chunks(engine, analysis_id, kind, chunk_size=1))
+        live = "".join(iter_csv_chunks(frame, chunk_size=1))
+        assert saved == live, kind
+
+
+def test_csv_itemsets_read_back_unchanged(analysis):
+    _, _, frequent_itemsets, _ = analysis
+
+    exported = pd.read_csv(io.StringIO("".join(iter_csv_chunks(frequent_itemsets))))
+    assert [frozenset(json.loads(text)) for text in exported['itemsets']] == list(frequent_itemsets['itemsets'])
@@ -0,0 +1,127 @@
+import functools
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('mlxtend')
+from mlxtend.frequent_patterns import apriori
+
+from hierarchy import load_taxonomy, mine_hierarchical
+
+# 'Accessories' exists under two departments; p8 has no category, p9 is not in the taxonomy at all
+TAXONOMY = pd.DataFrame({
+    'product': ['p0', 'p1', 'p2', 'p3', 'p4', 'p5', 'p6', 'p7', 'p8'],
+    'category': ['Accessories', 'Accessories', 'Phones', 'Accessories', 'Shirts', 'Shirts', 'Dairy', 'Dairy', None],
+    'department': ['Electronics', 'Electronics', 'Electronics', 'Apparel', 'Apparel', 'Apparel', 'Food', 'Food',
+                   'Food'],
+})
+PRODUCTS = [f'p{i}' for i in range(10)]
+
+
+@functools.lru_cache(maxsize=None)
+def ancestors(product):
+    """
+    Labels of the known taxonomy ancestors of a product.
+    """
+    row = TAXONOMY[TAXONOMY['product'] == product]
+    if row.empty:
+        return frozenset()
+    category, department = row['category'].iloc[0], row['department'].iloc[0]
+    labels = {f'department={department}'}
+    if pd.notna(category):
+        labels.add(f'category={department} > {category}')
+    return frozenset(labels)
+
+
+def generalized_baskets(df):
+    baskets = []
+    for _, products in df.groupby('transactions')['product']:
+        basket = set(products)
+        for product in products:
+            basket |= ancestors(product)
+        baskets.append(frozenset(basket))
+    return baskets
+
+
+def item_ancestors(item):
+    """
+    Labels of the ancestors of any generalized item.
+    """
+    if item.startswith('category='):
+        return {'department=' + item[len('category='):].split(' > ')[0]}
+    if item.startswith('department='):
+        return set()
+    return ancestors(item)
+
+
+def related(a, b):
+    """
+    Whether one item is an ancestor of the other.
+    """
+    return a in item_ancestors(b) or b in item_ancestors(a)
+
+
+@pytest.fixture
+def transactions():
+    rng = np.random.default_rng(3)
+    weights = np.linspace(2.0, 0.2, len(PRODUCTS))
+    return pd.DataFrame({
+        'transactions': rng.integers(0, 400, 3000),
+        'product': rng.choice(PRODUCTS, 3000, p=weights / weights.sum()),
+    })
+
+
+def test_mine_hierarchical_matches_brute_force(transactions):
+    min_support = 0.05
+    frequent_itemsets, labels = mine_hierarchical(transactions, load_taxonomy(TAXONOMY), min_support)
+    baskets = generalized_baskets(transactions)
+
+    def support(itemset):
+        return sum(itemset <= basket for basket in baskets) / len(baskets)
+
+    # Every mined support is exact
+    for itemset, mined_support in zip(frequent_itemsets['itemsets'], frequent_itemsets['support']):
+        assert mined_support == pytest.approx(support(itemset))
+
+    # Every frequent itemset without an ancestor pair is found, and nothing else
+    all_items = sorted(set().union(*baskets))
+    expected = set()
+    for size in range(1, 4):
+        for combo in itertools.combinations(all_items, size):
+            if any(related(a, b) for a, b in itertools.combinations(combo, 2)):
+                continue
+            if support(frozenset(combo)) >= min_support:
+                expected.add(frozenset(combo))
+    mined = {itemset for itemset in frequent_itemsets['itemsets'] if len(itemset) <= 3}
+    assert mined == expected
+    assert set(labels) == {item for itemset in expected if len(itemset) == 1 for item in itemset}
+
+
+def test_itemsets_never_pair_a_node_with_its_ancestor(transactions):
+    frequent_itemsets, _ = mine_hierarchical(transactions, load_taxonomy(TAXONOMY), 0.02)
+
+    assert (frequent_itemsets['itemsets'].map(len) > 1).any()
+    for itemset in frequent_itemsets['itemsets']:
+        for a, b in itertools.combinations(itemset, 2):
+            assert not related(a, b), itemset
+
+
+def test_equally_named_categories_stay_separate(transactions):
+    _, labels = mine_hierarchical(transactions, load_taxonomy(TAXONOMY), 0.01)
+
+    assert 'category=Electronics > Accessories' in labels
+    assert 'category=Apparel > Accessories' in labels
+    # Products without a known category do not form a shared catch-all node
+    assert not any(label.startswith('category=') and 'Other' in label for label in labels)
+    assert 'p8' in labels and 'p9' in labels
+
+
+def test_product_level_only_matches_flat_apriori(transactions):
+    frequent_itemsets, _ = mine_hierarchical(transactions, load_taxonomy(TAXONOMY), 0.05, levels=['product'])
+
+    basket = pd.crosstab(transactions['transactions'], transactions['product']).astype(bool)
+    expected = apriori(basket, min_support=0.05, use_colnames=True)
+    assert dict(zip(frequent_itemsets['itemsets'], frequent_itemsets['support'])) == pytest.approx(
+        dict(zip(expected['itemsets'], expected['support'])))
@@ -0,0 +1,26 @@
+from sqlalchemy import create_engine, inspect, text
+
+from migrations import ADDED_COLUMNS, add_missing_columns
+
+
+def test_add_missing_columns_is_idempotent():
+    engine = create_engine('sqlite://')
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE analysis_history (id INTEGER PRIMARY KEY, filename TEXT)"))
+        connection.execute(text("CREATE TABLE saved_rules (id INTEGER PRIMARY KEY, lift FLOAT)"))
+
+    add_missing_columns(engine)
+    add_missing_columns(engine)
+
+    inspector = inspect(engine)
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        assert {name for name, _ in columns} <= existing
+
+
+def test_add_missing_columns_skips_missing_tables():
+    engine = create_engine('sqlite://')
+
+    add_missing_columns(engine)
+
+    assert inspect(engine).get_table_names() == []
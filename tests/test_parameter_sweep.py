@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+pytest.importorskip('mlxtend')
+from mlxtend.frequent_patterns import apriori, association_rules
+
+from models import AnalysisHistory, Base, SavedItemset, SavedRule
+from parameter_sweep import build_basket, run_sweep, save_sweep
+
+GRID = {
+    'min_support': [0.05, 0.1],
+    'min_confidence': [0.2, 0.5],
+    'min_lift': [1.0, 1.05],
+    'min_product_frequency': [10, 400],
+}
+
+
+def rule_pairs(rules):
+    if len(rules) == 0:
+        return set()
+    return set(zip(rules['antecedents'], rules['consequents']))
+
+
+@pytest.fixture(scope='module')
+def transactions():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'transactions': rng.integers(0, 500, 5000),
+        'product': rng.choice(list('abcdefgh'), 5000, p=[.3, .2, .15, .1, .1, .05, .05, .05]),
+    })
+
+
+@pytest.fixture(scope='module')
+def sweep(transactions):
+    return run_sweep(transactions, GRID, max_workers=1)
+
+
+def test_sweep_matches_mining_each_point_directly(transactions, sweep):
+    summary, _ = sweep
+
+    assert len(summary) == 16
+    for point in summary.to_dict('records'):
+        basket = build_basket(transactions, point['min_product_frequency'])
+        frequent_itemsets = apriori(basket, min_support=point['min_support'], use_colnames=True)
+        rules = association_rules(frequent_itemsets, metric="confidence", min_threshold=point['min_confidence'])
+        rules = rules[rules['lift'] >= point['min_lift']]
+
+        assert point['frequent_itemset_count'] == len(frequent_itemsets), point
+        assert point['rule_count'] == len(rules), point
+
+
+def test_parallel_sweep_matches_serial_sweep(transactions, sweep):
+    serial_summary, serial_results = sweep
+
+    parallel_summary, parallel_results = run_sweep(transactions, GRID, max_workers=2)
+
+    pd.testing.assert_frame_equal(parallel_summary, serial_summary)
+    for parallel, serial in zip(parallel_results, serial_results):
+        assert rule_pairs(parallel['rules']) == rule_pairs(serial['rules'])
+
+
+def test_save_sweep_stores_every_point_for_the_user(sweep):
+    summary, results = sweep
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    analysis_ids = save_sweep(db, 'alice', 'baskets.csv', results)
+
+    assert len(analysis_ids) == len(results)
+    saved = db.execute(select(AnalysisHistory.username, AnalysisHistory.min_support, AnalysisHistory.min_confidence,
+                              AnalysisHistory.min_lift, AnalysisHistory.min_product_frequency,
+                              AnalysisHistory.frequent_itemset_count, AnalysisHistory.rule_count)
+                       .order_by(AnalysisHistory.id)).all()
+    expected = summary[['min_support', 'min_confidence', 'min_lift', 'min_product_frequency',
+                        'frequent_itemset_count', 'rule_count']].itertuples(index=False, name=None)
+    assert [row[1:] for row in saved] == list(expected)
+    assert {row[0] for row in saved} == {'alice'}
+    assert db.query(SavedRule).count() == summary['rule_count'].sum()
+    assert db.query(SavedItemset).count() == summary['frequent_itemset_count'].sum()
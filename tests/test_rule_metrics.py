@@ -0,0 +1,114 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rule_metrics import (RULE_METRICS, build_item_index, build_support_lookup, compute_rule_metrics,
+                          filter_rules, sort_rules)
+
+ITEMS = ['a', 'b', 'c', 'd', 'e']
+
+
+def brute_force_support(transactions, itemset):
+    return sum(itemset <= transaction for transaction in transactions) / len(transactions)
+
+
+def mine(transactions, min_support):
+    """
+    Frequent itemsets and every rule they yield, by full enumeration.
+    """
+    itemsets, supports = [], []
+    for size in range(1, len(ITEMS) + 1):
+        for combo in itertools.combinations(ITEMS, size):
+            support = brute_force_support(transactions, frozenset(combo))
+            if support >= min_support:
+                itemsets.append(frozenset(combo))
+                supports.append(support)
+    frequent_itemsets = pd.DataFrame({'support': supports, 'itemsets': itemsets})
+
+    antecedents, consequents = [], []
+    for itemset in itemsets:
+        for size in range(1, len(itemset)):
+            for antecedent in itertools.combinations(sorted(itemset), size):
+                antecedents.append(frozenset(antecedent))
+                consequents.append(itemset - frozenset(antecedent))
+    rules = pd.DataFrame({'antecedents': antecedents, 'consequents': consequents})
+    return frequent_itemsets, rules
+
+
+def reference_metrics(transactions, antecedent, consequent):
+    s_a = brute_force_support(transactions, antecedent)
+    s_c = brute_force_support(transactions, consequent)
+    s_ab = brute_force_support(transactions, antecedent | consequent)
+    confidence = s_ab / s_a
+    leverage = s_ab - s_a * s_c
+    zhang_denominator = max(s_ab * (1 - s_a), s_a * (s_c - s_ab))
+    return {
+        'support': s_ab,
+        'confidence': confidence,
+        'lift': confidence / s_c,
+        'leverage': leverage,
+        'conviction': np.inf if confidence >= 1 else (1 - s_c) / (1 - confidence),
+        'zhangs_metric': 0.0 if zhang_denominator == 0 else leverage / zhang_denominator,
+        'jaccard': s_ab / (s_a + s_c - s_ab),
+        'all_confidence': s_ab / max(brute_force_support(transactions, {item}) for item in antecedent | consequent),
+    }
+
+
+@pytest.fixture
+def transactions():
+    rng = np.random.default_rng(7)
+    weights = np.array([0.7, 0.5, 0.4, 0.3, 0.2])
+    baskets = [frozenset(np.array(ITEMS)[rng.random(len(ITEMS)) < weights]) for _ in range(300)]
+    # 'e' is only ever bought together with 'a', so confidence(e -> a) is exactly 1
+    return [basket | {'a'} if 'e' in basket else basket for basket in baskets]
+
+
+def test_compute_rule_metrics_matches_brute_force(transactions):
+    frequent_itemsets, rules = mine(transactions, min_support=0.05)
+    item_index = build_item_index(ITEMS)
+    result = compute_rule_metrics(rules, build_support_lookup(frequent_itemsets, item_index), item_index)
+
+    assert len(result) == len(rules) > 0
+    for row in result.itertuples(index=False):
+        row = row._asdict()
+        expected = reference_metrics(transactions, row['antecedents'], row['consequents'])
+        for metric in RULE_METRICS:
+            assert row[metric] == pytest.approx(expected[metric]), metric
+
+
+def test_conviction_is_inf_when_confidence_is_one(transactions):
+    frequent_itemsets, rules = mine(transactions, min_support=0.05)
+    item_index = build_item_index(ITEMS)
+    result = compute_rule_metrics(rules, build_support_lookup(frequent_itemsets, item_index), item_index)
+
+    certain = result[(result['antecedents'] == frozenset({'e'})) & (result['consequents'] == frozenset({'a'}))]
+    assert certain['confidence'].iloc[0] == pytest.approx(1.0)
+    assert np.isposinf(certain['conviction'].iloc[0])
+
+
+def test_sort_rules_places_nan_last():
+    rules = pd.DataFrame({'lift': [1.5, np.nan, 3.0, np.inf, 0.5]})
+
+    assert sort_rules(rules, 'lift')['lift'].tolist()[:4] == [np.inf, 3.0, 1.5, 0.5]
+    assert np.isnan(sort_rules(rules, 'lift')['lift'].iloc[-1])
+    assert sort_rules(rules, 'lift', ascending=True)['lift'].tolist()[:4] == [0.5, 1.5, 3.0, np.inf]
+    assert np.isnan(sort_rules(rules, 'lift', ascending=True)['lift'].iloc[-1])
+
+
+def test_filter_rules_ignores_unset_thresholds():
+    rules = pd.DataFrame({'lift': [1.0, 2.0, 3.0], 'jaccard': [0.5, 0.1, np.nan]})
+
+    assert filter_rules(rules, {'lift': 2.0, 'jaccard': None})['lift'].tolist() == [2.0, 3.0]
+    assert filter_rules(rules, {'lift': 1.0, 'jaccard': 0.2})['lift'].tolist() == [1.0]
+
+
+def test_compute_rule_metrics_handles_no_rules():
+    item_index = build_item_index(ITEMS)
+    rules = pd.DataFrame({'antecedents': [], 'consequents': []})
+
+    result = compute_rule_metrics(rules, {(0,): 0.5}, item_index)
+
+    assert len(result) == 0
+    assert set(RULE_METRICS) <= set(result.columns)